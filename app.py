@@ -1,17 +1,52 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, Response
 from flask_cors import CORS
+from sqlalchemy.orm import raiseload, selectinload
+import orjson
 import os
+from functools import lru_cache
+import random
+import shutil
 import uuid
 import tempfile
 from models import db, Question, UserResponse, UserResult, UserProgress
-from speech_analyzer import analyze_speech, transcribe_audio
-from gemini_analyzer import analyze_with_gemini
+import gemini_analyzer
+import tasks
 from config import Config
 
 app = Flask(__name__)
 app.config.from_object(Config)
 CORS(app)
 db.init_app(app)
+gemini_analyzer.init_app(app)
+tasks.init_app(app)
+
+def ojsonify(obj):
+    """jsonify replacement backed by orjson (C-speed encode, native datetimes)."""
+    return Response(orjson.dumps(obj, option=orjson.OPT_NAIVE_UTC), mimetype='application/json')
+
+# The question list only changes when seed_database runs, so the
+# serialized per-part dicts are cached in-process; get_questions then
+# serves random samples without touching the database or the ORM.
+# Invalidated via cache_clear() whenever seed_database runs.
+@lru_cache(maxsize=1)
+def _questions_by_part():
+    """Load and serialize all questions, grouped by IELTS part."""
+    return {
+        part: [
+            {
+                'id': q.id,
+                'text': q.text,
+                'part': q.part,
+                'topic': q.topic,
+                'isAudioOnly': False  # Default value, frontend can override
+            }
+            # raiseload: this query never needs the responses backref, and
+            # an accidental lazy load should fail loudly rather than query
+            # silently
+            for q in Question.query.options(raiseload('*')).filter_by(part=part)
+        ]
+        for part in (1, 2, 3)
+    }
 
 @app.route('/api/get-questions', methods=['GET'])
 def get_questions():
@@ -19,120 +54,104 @@ def get_questions():
     Get 6 random IELTS speaking questions.
     Returns a JSON array of question objects.
     """
-    # Get random questions from each part
-    part1_questions = Question.query.filter_by(part=1).order_by(db.func.random()).limit(2).all()
-    part2_questions = Question.query.filter_by(part=2).order_by(db.func.random()).limit(2).all()
-    part3_questions = Question.query.filter_by(part=3).order_by(db.func.random()).limit(2).all()
-    
-    # Combine all questions
-    questions = part1_questions + part2_questions + part3_questions
-    
-    # Convert to JSON
-    questions_json = [
-        {
-            'id': q.id,
-            'text': q.text,
-            'part': q.part,
-            'topic': q.topic,
-            'isAudioOnly': False  # Default value, frontend can override
-        } for q in questions
-    ]
-    
-    return jsonify(questions_json)
+    # Sample 2 questions per part from the in-process cache
+    by_part = _questions_by_part()
+    questions_json = []
+    for part in (1, 2, 3):
+        pool = by_part[part]
+        questions_json.extend(random.sample(pool, min(2, len(pool))))
+
+    return ojsonify(questions_json)
 
 @app.route('/api/submit-response', methods=['POST'])
 def submit_response():
     """
     Submit a user's audio response for analysis.
-    Expects: 
+    Expects:
     - audio file in request.files['audio']
     - question_id in request.form
     - question_text in request.form
     - user_id in request.form
-    Returns analysis results.
+    Stores the response, queues the analysis pipeline in the background,
+    and returns 202 with the response_id to poll /api/response/<id>.
     """
     if 'audio' not in request.files:
-        return jsonify({'error': 'No audio file provided'}), 400
-    
+        return ojsonify({'error': 'No audio file provided'}), 400
+
     audio_file = request.files['audio']
     question_id = request.form.get('question_id')
     question_text = request.form.get('question_text')
     user_id = request.form.get('user_id')
-    
+
     if not question_id or not user_id:
-        return jsonify({'error': 'Missing question_id or user_id'}), 400
-    
-    # Save audio file temporarily
-    temp_dir = tempfile.gettempdir()
-    temp_path = os.path.join(temp_dir, f"{uuid.uuid4()}.wav")
-    audio_file.save(temp_path)
-    
-    try:
-        # Transcribe audio
-        transcript = transcribe_audio(temp_path)
-        
-        # Get question for context
-        question = Question.query.get(question_id)
-        if not question:
-            # If question not found in DB but text was provided, use that
-            if question_text:
-                question_context = question_text
-            else:
-                return jsonify({'error': 'Question not found'}), 404
+        return ojsonify({'error': 'Missing question_id or user_id'}), 400
+
+    # Get question for context
+    question = Question.query.get(question_id)
+    if not question:
+        # If question not found in DB but text was provided, use that
+        if question_text:
+            question_context = question_text
         else:
-            question_context = question.text
-        
-        # Analyze speech with traditional NLP
-        nlp_analysis = analyze_speech(transcript)
-        
-        # Analyze with Gemini AI for deeper insights
-        gemini_analysis = analyze_with_gemini(transcript, question_context)
-        
-        # Combine analyses for final result
-        combined_analysis = combine_analyses(nlp_analysis, gemini_analysis)
-        
-        # Store response in database
-        user_response = UserResponse(
-            user_id=user_id,
-            question_id=question_id,
-            audio_path=temp_path,  # In production, you'd store this in a more permanent location
-            transcript=transcript
-        )
-        db.session.add(user_response)
-        
-        # Create user result record
-        user_result = UserResult(
-            user_id=user_id,
-            response_id=user_response.id,
-            fluency_score=combined_analysis['fluency_score'],
-            vocabulary_score=combined_analysis['vocabulary_score'],
-            grammar_score=combined_analysis['grammar_score'],
-            coherence_score=combined_analysis['coherence_score'],
-            overall_score=combined_analysis['overall_score'],
-            feedback=combined_analysis['feedback']
-        )
-        db.session.add(user_result)
-        
-        # Update user progress
-        update_user_progress(user_id, combined_analysis['overall_score'])
-        
-        db.session.commit()
-        
-        # Return analysis results
-        return jsonify({
-            'response_id': user_response.id,
-            'transcript': transcript,
-            'analysis': combined_analysis
-        })
-    
-    except Exception as e:
-        db.session.rollback()
-        return jsonify({'error': str(e)}), 500
-    finally:
-        # In a production environment, you might want to keep the audio files
-        # Here we're removing them after processing
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
+            return ojsonify({'error': 'Question not found'}), 404
+    else:
+        question_context = question.text
+
+    # Save audio file temporarily, preferring tmpfs so the upload never
+    # touches disk, and streaming in 1 MB chunks
+    temp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    temp_path = os.path.join(temp_dir, f"{uuid.uuid4()}.wav")
+    with open(temp_path, 'wb') as f:
+        shutil.copyfileobj(audio_file.stream, f, 1 << 20)
+
+    # Store the response and hand the heavy pipeline (transcription +
+    # analyses + scoring) to the background worker
+    user_response = UserResponse(
+        user_id=user_id,
+        question_id=question_id,
+        audio_path=temp_path,  # In production, you'd store this in a more permanent location
+        status='queued'
+    )
+    db.session.add(user_response)
+    db.session.commit()
+
+    tasks.enqueue_response(user_response.id, temp_path, question_context)
+
+    return ojsonify({
+        'response_id': user_response.id,
+        'status': 'queued'
+    }), 202
+
+@app.route('/api/response/<int:response_id>', methods=['GET'])
+def get_response(response_id):
+    """
+    Poll the processing status of a submitted response.
+    Returns the transcript and analysis scores once processing is done.
+    """
+    user_response = UserResponse.query.get(response_id)
+    if not user_response:
+        return ojsonify({'error': 'Response not found'}), 404
+
+    payload = {
+        'response_id': user_response.id,
+        'status': user_response.status,
+        'transcript': user_response.transcript
+    }
+
+    if user_response.status == 'done':
+        result = UserResult.query.filter_by(response_id=user_response.id) \
+            .order_by(UserResult.created_at.desc()).first()
+        if result:
+            payload['analysis'] = {
+                'fluency_score': result.fluency_score,
+                'vocabulary_score': result.vocabulary_score,
+                'grammar_score': result.grammar_score,
+                'coherence_score': result.coherence_score,
+                'overall_score': result.overall_score,
+                'feedback': result.feedback
+            }
+
+    return ojsonify(payload)
 
 @app.route('/api/user-progress/<user_id>', methods=['GET'])
 def get_user_progress(user_id):
@@ -143,17 +162,23 @@ def get_user_progress(user_id):
     # Get user progress records
     progress = UserProgress.query.filter_by(user_id=user_id).order_by(UserProgress.created_at).all()
     
-    # Get recent test results
-    results = UserResult.query.filter_by(user_id=user_id).order_by(UserResult.created_at.desc()).limit(10).all()
-    
+    # Get recent test results with their responses and questions eagerly
+    # (avoids issuing two extra queries per result row). raiseload makes
+    # any relationship we forgot to eager-load raise instead of silently
+    # reintroducing an N+1.
+    results = UserResult.query.options(
+        selectinload(UserResult.response).selectinload(UserResponse.question),
+        raiseload('*')
+    ).filter_by(user_id=user_id).order_by(UserResult.created_at.desc()).limit(10).all()
+
     results_json = []
     for result in results:
-        response = UserResponse.query.get(result.response_id)
-        question = Question.query.get(response.question_id)
-        
+        response = result.response
+        question = response.question
+
         results_json.append({
             'id': result.id,
-            'date': result.created_at.isoformat(),
+            'date': result.created_at,  # orjson serializes datetimes natively
             'question': {
                 'id': question.id if question else None,
                 'text': question.text if question else "Unknown question",
@@ -170,105 +195,25 @@ def get_user_progress(user_id):
     
     # Format progress data for chart display
     progress_data = {
-        'dates': [p.created_at.isoformat() for p in progress],
+        'dates': [p.created_at for p in progress],
         'scores': [p.average_score for p in progress],
         'recent_results': results_json
     }
     
-    return jsonify(progress_data)
-
-def combine_analyses(nlp_analysis, gemini_analysis):
-    """
-    Combine traditional NLP analysis with Gemini AI analysis.
-    
-    Args:
-        nlp_analysis: Results from traditional NLP analysis
-        gemini_analysis: Results from Gemini AI analysis
-        
-    Returns:
-        Combined analysis results
-    """
-    # Extract scores from both analyses
-    fluency_nlp = nlp_analysis['fluency_score']
-    vocabulary_nlp = nlp_analysis['vocabulary_score']
-    grammar_nlp = nlp_analysis['grammar_score']
-    
-    fluency_gemini = gemini_analysis['fluency_score']
-    vocabulary_gemini = gemini_analysis['vocabulary_score']
-    grammar_gemini = gemini_analysis['grammar_score']
-    coherence_gemini = gemini_analysis['coherence_score']
-    
-    # Weighted combination (giving more weight to Gemini for deeper analysis)
-    fluency_combined = (fluency_nlp * 0.4) + (fluency_gemini * 0.6)
-    vocabulary_combined = (vocabulary_nlp * 0.4) + (vocabulary_gemini * 0.6)
-    grammar_combined = (grammar_nlp * 0.4) + (grammar_gemini * 0.6)
-    
-    # Calculate overall score (including coherence from Gemini)
-    overall_score = (
-        fluency_combined * 0.3 +
-        vocabulary_combined * 0.25 +
-        grammar_combined * 0.25 +
-        coherence_gemini * 0.2
-    )
-    
-    # Combine feedback
-    nlp_feedback = nlp_analysis.get('feedback', '{}')
-    gemini_feedback = gemini_analysis.get('feedback', '{}')
-    
-    # For simplicity, we'll use Gemini's feedback as it's more comprehensive
-    # In a production system, you might want to merge the feedback more intelligently
-    
-    return {
-        'fluency_score': round(fluency_combined, 1),
-        'vocabulary_score': round(vocabulary_combined, 1),
-        'grammar_score': round(grammar_combined, 1),
-        'coherence_score': round(coherence_gemini, 1),
-        'overall_score': round(overall_score, 1),
-        'feedback': gemini_feedback,
-        'nlp_analysis': nlp_analysis,
-        'gemini_analysis': gemini_analysis
-    }
-
-def update_user_progress(user_id, score):
-    """
-    Update user progress with new test score.
-    
-    Args:
-        user_id: User identifier
-        score: New test score
-    """
-    # Get existing progress or create new
-    progress = UserProgress.query.filter_by(user_id=user_id).first()
-    
-    if progress:
-        # Update existing progress
-        progress.test_count += 1
-        progress.total_score += score
-        progress.average_score = progress.total_score / progress.test_count
-        progress.latest_score = score
-    else:
-        # Create new progress record
-        progress = UserProgress(
-            user_id=user_id,
-            test_count=1,
-            total_score=score,
-            average_score=score,
-            latest_score=score
-        )
-        db.session.add(progress)
+    return ojsonify(progress_data)
 
 @app.route('/api/test', methods=['GET'])
 def test_endpoint():
     """Simple endpoint to test if the API is running."""
-    return jsonify({'status': 'API is running'})
+    return ojsonify({'status': 'API is running'})
 
-@app.before_request
-def create_tables():
-    """Create database tables before first request."""
+def init_db():
+    """Create database tables and seed them if empty. Runs once at startup."""
     db.create_all()
-    
+
     # Seed the database with sample questions if it's empty
-    if Question.query.count() == 0:
+    # (first() is cheaper than count() - it stops at one row)
+    if Question.query.first() is None:
         seed_database()
 
 def seed_database():
@@ -305,12 +250,18 @@ def seed_database():
         {'text': 'How might climate change affect future generations?', 'part': 3, 'topic': 'Environment'}
     ]
     
-    for q in sample_questions:
-        question = Question(text=q['text'], part=q['part'], topic=q['topic'])
-        db.session.add(question)
-    
+    # Insert all questions in a single multi-row statement rather than
+    # one INSERT per question (the dicts already match the column names)
+    db.session.bulk_insert_mappings(Question, sample_questions)
     db.session.commit()
 
+    # New questions exist, so the cached per-part question lists are stale
+    _questions_by_part.cache_clear()
+
+# Create and seed tables once at startup instead of on every request
+with app.app_context():
+    init_db()
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=int(os.environ.get("PORT", 5000)), debug=True)
 
@@ -5,6 +5,18 @@ class Config:
     # Database configuration
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///ielts_speaking.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Reuse pooled connections instead of reconnecting per request;
+    # pre_ping drops stale connections before they surface as errors.
+    # The sizing options only apply off SQLite: file-based SQLite URLs
+    # get a NullPool under SQLAlchemy 1.x, and passing QueuePool-only
+    # arguments there is a TypeError at engine creation.
+    SQLALCHEMY_ENGINE_OPTIONS = {'pool_pre_ping': True}
+    if not SQLALCHEMY_DATABASE_URI.startswith('sqlite'):
+        SQLALCHEMY_ENGINE_OPTIONS.update({
+            'pool_size': 10,
+            'max_overflow': 20
+        })
     
     # Secret key for session management
     SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-key-change-in-production')
@@ -16,3 +28,11 @@ class Config:
     # Gemini API key
     GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY', 'your-gemini-api-key')
 
+    # Background worker pool size; bound this by the ASR/Gemini
+    # concurrency quota of the deployment
+    TASK_MAX_WORKERS = int(os.environ.get('TASK_MAX_WORKERS', 10))
+
+    # Gemini analysis cache (shared via Redis when REDIS_URL is set)
+    ENABLE_GEMINI_CACHE = os.environ.get('ENABLE_GEMINI_CACHE', 'false').lower() in ('true', '1', 'yes')
+    REDIS_URL = os.environ.get('REDIS_URL')
+
@@ -1,8 +1,25 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from datetime import datetime
+import sqlite3
 
 db = SQLAlchemy()
 
+@event.listens_for(Engine, "connect")
+def _set_sqlite_pragma(dbapi_conn, connection_record):
+    """Enable WAL mode on SQLite connections.
+
+    WAL lets readers proceed while a write is in flight, and
+    synchronous=NORMAL drops the per-commit fsync that the default
+    rollback journal pays. No-op for other database engines.
+    """
+    if isinstance(dbapi_conn, sqlite3.Connection):
+        cursor = dbapi_conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
 class Question(db.Model):
     """IELTS speaking test questions."""
     id = db.Column(db.Integer, primary_key=True)
@@ -10,6 +27,8 @@ class Question(db.Model):
     part = db.Column(db.Integer, nullable=False)  # 1, 2, or 3 for IELTS speaking parts
     topic = db.Column(db.String(100), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (db.Index('ix_question_part', 'part'),)
     
     def __repr__(self):
         return f'<Question {self.id}: {self.text[:30]}...>'
@@ -21,11 +40,14 @@ class UserResponse(db.Model):
     question_id = db.Column(db.Integer, db.ForeignKey('question.id'), nullable=False)
     audio_path = db.Column(db.String(255), nullable=True)  # Path to stored audio file
     transcript = db.Column(db.Text, nullable=True)  # Transcribed text from audio
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued / done / error
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
     question = db.relationship('Question', backref=db.backref('responses', lazy=True))
-    
+
+    __table_args__ = (db.Index('ix_response_question', 'question_id'),)
+
     def __repr__(self):
         return f'<UserResponse {self.id} from user {self.user_id}>'
 
@@ -44,7 +66,14 @@ class UserResult(db.Model):
     
     # Relationships
     response = db.relationship('UserResponse', backref=db.backref('results', lazy=True))
-    
+
+    # Supports the filter-by-user + order-by-recency query in
+    # get_user_progress, and the by-response lookup in the polling endpoint
+    __table_args__ = (
+        db.Index('ix_result_user_created_desc', 'user_id', db.desc('created_at')),
+        db.Index('ix_result_response', 'response_id'),
+    )
+
     def __repr__(self):
         return f'<UserResult {self.id} for response {self.response_id}>'
 
@@ -58,7 +87,9 @@ class UserProgress(db.Model):
     latest_score = db.Column(db.Float, default=0.0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    
+
+    __table_args__ = (db.Index('ix_progress_user_created', 'user_id', 'created_at'),)
+
     def __repr__(self):
         return f'<UserProgress for user {self.user_id}, avg: {self.average_score}>'
 
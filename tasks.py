@@ -0,0 +1,170 @@
+from concurrent.futures import ThreadPoolExecutor
+import contextlib
+import os
+import threading
+import numpy as np
+from sqlalchemy import update
+from config import Config
+from models import db, UserProgress, UserResponse, UserResult
+from speech_analyzer import transcribe_and_analyze
+from gemini_analyzer import analyze_with_gemini
+
+# In-process background worker pool. Submissions are acknowledged with
+# 202 + response_id and processed here, so HTTP workers are free again
+# in milliseconds instead of being held for the whole pipeline. The pool
+# size bounds how many responses are transcribed/analyzed at once during
+# bursts; keep it within the ASR/Gemini concurrency quota.
+_executor = ThreadPoolExecutor(max_workers=Config.TASK_MAX_WORKERS)
+
+# Separate pool for the per-task analysis fan-out; reusing _executor for
+# it could deadlock once every worker is busy waiting on a sub-future
+_analysis_executor = ThreadPoolExecutor(max_workers=Config.TASK_MAX_WORKERS)
+_app = None
+
+def init_app(app):
+    """Keep a reference to the Flask app so tasks can push an app context."""
+    global _app
+    _app = app
+
+def enqueue_response(response_id, audio_path, question_text):
+    """Queue background processing for a stored UserResponse."""
+    _executor.submit(process_response, response_id, audio_path, question_text)
+
+def process_response(response_id, audio_path, question_text):
+    """
+    Run the full analysis pipeline for a submitted response.
+
+    Transcribes the audio, runs the NLP and Gemini analyses, stores the
+    UserResult, and updates the user's progress. Sets the response
+    status to 'done' or 'error' for clients polling /api/response/<id>.
+    """
+    with _app.app_context():
+        user_response = UserResponse.query.get(response_id)
+        try:
+            # transcribe_and_analyze overlaps Whisper decoding with the
+            # spaCy parse; the callback fires as soon as the transcript
+            # is complete, putting the Gemini call in flight while the
+            # grammar check and scoring still run
+            gemini_futures = []
+
+            def _start_gemini(transcript):
+                gemini_futures.append(
+                    _analysis_executor.submit(analyze_with_gemini, transcript, question_text)
+                )
+
+            transcript, nlp_analysis = transcribe_and_analyze(audio_path, on_transcript=_start_gemini)
+            user_response.transcript = transcript
+
+            gemini_analysis = gemini_futures[0].result()
+            gemini_analysis.pop('_cache_status', None)
+
+            combined_analysis = combine_analyses(nlp_analysis, gemini_analysis)
+
+            user_result = UserResult(
+                user_id=user_response.user_id,
+                response_id=user_response.id,
+                fluency_score=combined_analysis['fluency_score'],
+                vocabulary_score=combined_analysis['vocabulary_score'],
+                grammar_score=combined_analysis['grammar_score'],
+                coherence_score=combined_analysis['coherence_score'],
+                overall_score=combined_analysis['overall_score'],
+                feedback=combined_analysis['feedback']
+            )
+            db.session.add(user_result)
+
+            update_user_progress(user_response.user_id, combined_analysis['overall_score'])
+
+            user_response.status = 'done'
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            user_response.status = 'error'
+            db.session.commit()
+        finally:
+            # Hand the unlink to a daemon thread so the worker slot frees
+            # up without waiting on the filesystem
+            threading.Thread(target=_unlink_quiet, args=(audio_path,), daemon=True).start()
+
+def _unlink_quiet(path):
+    """Delete a file, ignoring the case where it's already gone."""
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(path)
+
+# Combination weights: per-criterion NLP vs Gemini (more weight to Gemini
+# for deeper analysis), and fluency/vocabulary/grammar/coherence for the
+# overall score
+_W_CRITERION = np.array([0.4, 0.6])
+_W_OVERALL = np.array([0.3, 0.25, 0.25, 0.2])
+
+def combine_analyses(nlp_analysis, gemini_analysis):
+    """
+    Combine traditional NLP analysis with Gemini AI analysis.
+
+    Args:
+        nlp_analysis: Results from traditional NLP analysis
+        gemini_analysis: Results from Gemini AI analysis
+
+    Returns:
+        Combined analysis results
+    """
+    coherence_gemini = gemini_analysis['coherence_score']
+
+    # One dot product combines the three shared criteria, another folds
+    # in coherence for the overall score
+    combined = np.array([
+        [nlp_analysis['fluency_score'], gemini_analysis['fluency_score']],
+        [nlp_analysis['vocabulary_score'], gemini_analysis['vocabulary_score']],
+        [nlp_analysis['grammar_score'], gemini_analysis['grammar_score']]
+    ]) @ _W_CRITERION
+    overall_score = np.append(combined, coherence_gemini) @ _W_OVERALL
+
+    fluency_combined, vocabulary_combined, grammar_combined = combined
+
+    # For simplicity, we'll use Gemini's feedback as it's more comprehensive
+    # In a production system, you might want to merge the feedback more intelligently
+    gemini_feedback = gemini_analysis.get('feedback', '{}')
+
+    # Only the combined scores and feedback are kept - clients read them
+    # from UserResult, so embedding the raw per-analyzer dicts would just
+    # double the payload
+    # Cast back to builtin floats so the values serialize and bind cleanly
+    return {
+        'fluency_score': round(float(fluency_combined), 1),
+        'vocabulary_score': round(float(vocabulary_combined), 1),
+        'grammar_score': round(float(grammar_combined), 1),
+        'coherence_score': round(float(coherence_gemini), 1),
+        'overall_score': round(float(overall_score), 1),
+        'feedback': gemini_feedback
+    }
+
+def update_user_progress(user_id, score):
+    """
+    Update user progress with new test score.
+
+    Args:
+        user_id: User identifier
+        score: New test score
+    """
+    # Update the counters server-side in a single atomic statement, so
+    # concurrent submissions can't race a read-modify-write cycle
+    result = db.session.execute(
+        update(UserProgress)
+        .where(UserProgress.user_id == user_id)
+        .values(
+            test_count=UserProgress.test_count + 1,
+            total_score=UserProgress.total_score + score,
+            average_score=(UserProgress.total_score + score) / (UserProgress.test_count + 1),
+            latest_score=score
+        )
+    )
+
+    if result.rowcount == 0:
+        # No progress row yet for this user - create one
+        progress = UserProgress(
+            user_id=user_id,
+            test_count=1,
+            total_score=score,
+            average_score=score,
+            latest_score=score
+        )
+        db.session.add(progress)